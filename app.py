@@ -1,16 +1,23 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, jsonify
+from flask import Flask, render_template, request, url_for, send_file, jsonify
+import atexit
 import os
+import shutil
 import tempfile
 import uuid
 import re
 import threading
 import time
-from queue import Queue, Empty
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from converter import process_doc
 
 ALLOWED_EXTENSIONS = {"docx"}
 
+# Windows-forbidden filename characters: <>:"/\|?* plus all control chars
+# (which also covers \n, \r and \t). Compiled once at import.
+_FORBIDDEN_CHARS = re.compile(r"[<>:\"/\\|?*\x00-\x1F]")
+
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
 app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB
@@ -25,11 +32,7 @@ def sanitize_filename_keep_parens(name: str) -> str:
     Sanitize the filename while preserving parentheses. Prevents directory traversal and removes
     characters outside of the allowed set: letters, numbers, spaces, underscore, hyphen, dot, parentheses.
     """
-    base = os.path.basename(name)
-    # Remove Windows-forbidden characters: <>:"/\|?* and control chars
-    base = re.sub(r"[<>:\"/\\|?*\x00-\x1F]", "", base)
-    # Remove newlines and tabs explicitly just in case
-    base = base.replace("\n", "").replace("\r", "").replace("\t", "")
+    base = _FORBIDDEN_CHARS.sub("", os.path.basename(name))
     # Windows doesn't allow trailing spaces or dots in filenames
     base = base.rstrip(" .")
     # Avoid empty filename
@@ -41,79 +44,156 @@ def sanitize_filename_keep_parens(name: str) -> str:
     return base
 
 
-@app.route("/", methods=["GET"]) 
+def _save_upload(file, dest_path: str) -> None:
+    """
+    Write an uploaded FileStorage to dest_path. FileStorage.save copies with a
+    16 KiB buffer; a 1 MiB buffer cuts the read/write cycles ~64x on large uploads.
+    """
+    with open(dest_path, "wb") as dst:
+        shutil.copyfileobj(file.stream, dst, length=1024 * 1024)
+
+
+@app.route("/", methods=["GET"])
 def index():
     return render_template("index.html")
 
 
-JOBS = {}
+# JOBS_LOCK guards only the structure of the JOBS dict (insert/delete/lookup);
+# each job entry carries its own "lock" for field reads/writes, so progress
+# updates and polls on one job never serialize against unrelated jobs.
+# Kept as an OrderedDict in least-recently-used order and capped at MAX_JOBS:
+# finished jobs are evicted from the front when the cap is exceeded, so memory
+# no longer grows with total jobs served. Queued/processing jobs are pinned.
+JOBS: "OrderedDict[str, dict]" = OrderedDict()
 JOBS_LOCK = threading.Lock()
-JOB_QUEUE: Queue[str] = Queue()
+MAX_JOBS = int(os.environ.get("MAX_JOBS", "10000"))
+
+# How long finished jobs (and their temp upload dirs) are kept for /result,
+# and how long converted outputs stay on disk before the janitor prunes them.
+RESULT_TTL_SECONDS = int(os.environ.get("RESULT_TTL_SECONDS", str(60 * 60)))
+OUTPUT_TTL_SECONDS = int(os.environ.get("OUTPUT_TTL_SECONDS", str(24 * 60 * 60)))
+_CLEANUP_INTERVAL_SECONDS = 5 * 60
+# Bounded pool of worker threads; each conversion runs process_doc in its own
+# thread with its own COM apartment and warm Word instance, so WORKERS
+# concurrent Word instances handle batch uploads in parallel.
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("WORKERS", "2")),
+    thread_name_prefix="convert",
+)
+
+
+@atexit.register
+def _shutdown_executor():
+    EXECUTOR.shutdown(wait=False, cancel_futures=True)
 
 
 def _run_job(job_id: str, input_path: str, output_path: str):
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+    if job is None:
+        return
+
+    # The converter reports progress after every paragraph; publishing each call
+    # would take the job lock thousands of times per document and contend with
+    # the /progress handlers. Coalesce: only publish when the integer percent
+    # actually changes or at most every 50 ms.
+    last = [-1, 0.0]
+
     def on_progress(pct: int):
-        with JOBS_LOCK:
-            job = JOBS.get(job_id)
-            if job:
-                job["processing_pct"] = max(0, min(100, int(pct)))
+        pct = max(0, min(100, int(pct)))
+        now = time.monotonic()
+        if pct == last[0] and now - last[1] < 0.05:
+            return
+        last[0] = pct
+        last[1] = now
+        with job["lock"]:
+            job["processing_pct"] = pct
 
     try:
-        with JOBS_LOCK:
-            JOBS[job_id]["status"] = "processing"
-            JOBS[job_id]["processing_pct"] = 0
+        with job["lock"]:
+            job["status"] = "processing"
+            job["processing_pct"] = 0
 
         final_path = process_doc(input_path, output_path=output_path, visible=False, progress=on_progress)
-        with JOBS_LOCK:
-            JOBS[job_id]["status"] = "done"
-            JOBS[job_id]["final_path"] = final_path
-            JOBS[job_id]["processing_pct"] = 100
+        with job["lock"]:
+            job["status"] = "done"
+            job["final_path"] = final_path
+            job["processing_pct"] = 100
     except Exception as e:
-        with JOBS_LOCK:
-            JOBS[job_id]["status"] = "error"
-            JOBS[job_id]["error"] = str(e)
+        with job["lock"]:
+            job["status"] = "error"
+            job["error"] = str(e)
         # Log full traceback for debugging
         try:
             app.logger.exception("Job %s failed: %s", job_id, e)
         except Exception:
             pass
+    finally:
+        # Record when the job finished and where its temp upload dir lives so
+        # the janitor can reclaim both once RESULT_TTL_SECONDS have passed.
+        with job["lock"]:
+            job["tmpdir"] = os.path.dirname(input_path)
+            job["finished_at"] = time.time()
 
 
-def _worker_loop():
-    while True:
-        try:
-            job_id = JOB_QUEUE.get(timeout=0.5)
-        except Empty:
-            continue
-        with JOBS_LOCK:
-            job = JOBS.get(job_id)
-        if not job:
+def _cleanup_once():
+    now = time.time()
+
+    # Drop expired finished jobs and their temp upload dirs.
+    cutoff = now - RESULT_TTL_SECONDS
+    with JOBS_LOCK:
+        expired = [
+            (job_id, job)
+            for job_id, job in JOBS.items()
+            if job.get("finished_at") and job["finished_at"] < cutoff
+        ]
+        for job_id, _ in expired:
+            JOBS.pop(job_id, None)
+    for _, job in expired:
+        tmpdir = job.get("tmpdir")
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    # Prune converted outputs older than OUTPUT_TTL_SECONDS.
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    out_dir = os.path.join(project_root, "convertedDocx")
+    try:
+        entries = list(os.scandir(out_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.name.lower().endswith(".docx"):
             continue
-        # Each job dict stores paths
-        input_path = job.get("input_path")
-        output_path = job.get("output_path")
         try:
-            _run_job(job_id, input_path, output_path)
-        finally:
-            JOB_QUEUE.task_done()
+            if entry.is_file() and entry.stat().st_mtime < now - OUTPUT_TTL_SECONDS:
+                os.unlink(entry.path)
+        except OSError:
+            pass
 
 
-@app.route("/start", methods=["POST"]) 
-def start():
-    if "file" not in request.files:
-        return jsonify({"error": "No file part"}), 400
-    file = request.files["file"]
-    if file.filename == "":
-        return jsonify({"error": "No file selected"}), 400
-    if not allowed_file(file.filename):
-        return jsonify({"error": "Only .docx allowed"}), 400
+def _janitor_loop():
+    while True:
+        time.sleep(_CLEANUP_INTERVAL_SECONDS)
+        try:
+            _cleanup_once()
+        except Exception:
+            try:
+                app.logger.exception("Cleanup pass failed")
+            except Exception:
+                pass
 
+
+def _enqueue_job(file) -> tuple[str, str]:
+    """
+    Save an already-validated upload, register its job, and submit it to the
+    worker pool. Returns (job_id, sanitized filename).
+    """
     filename = sanitize_filename_keep_parens(file.filename)
 
     # Save upload to temp input; output to convertedDocx with same name
     tmpdir = tempfile.mkdtemp()
     input_path = os.path.join(tmpdir, f"{uuid.uuid4()}_{filename}")
-    file.save(input_path)
+    _save_upload(file, input_path)
 
     project_root = os.path.dirname(os.path.abspath(__file__))
     out_dir = os.path.join(project_root, "convertedDocx")
@@ -121,18 +201,45 @@ def start():
     output_path = os.path.join(out_dir, filename)
 
     job_id = str(uuid.uuid4())
+    job = {
+        "status": "queued",
+        "filename": filename,
+        "processing_pct": 0,
+        "final_path": None,
+        "error": None,
+        "input_path": input_path,
+        "output_path": output_path,
+        "lock": threading.Lock(),
+    }
+    evicted = []
     with JOBS_LOCK:
-        JOBS[job_id] = {
-            "status": "queued",
-            "filename": filename,
-            "processing_pct": 0,
-            "final_path": None,
-            "error": None,
-            "input_path": input_path,
-            "output_path": output_path,
-        }
-    JOB_QUEUE.put(job_id)
+        JOBS[job_id] = job
+        while len(JOBS) > MAX_JOBS:
+            oldest = next(iter(JOBS.values()))
+            if oldest["status"] not in ("done", "error"):
+                # Oldest entry is still queued/processing; nothing evictable
+                break
+            JOBS.popitem(last=False)
+            evicted.append(oldest)
+    for oldest in evicted:
+        tmpdir = oldest.get("tmpdir") or os.path.dirname(oldest["input_path"])
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    job["future"] = EXECUTOR.submit(_run_job, job_id, input_path, output_path)
+    return job_id, filename
+
+
+@app.route("/start", methods=["POST"])
+def start():
+    if "file" not in request.files:
+        return jsonify({"error": "No file part"}), 400
+    file = request.files["file"]
+    if file.filename == "":
+        return jsonify({"error": "No file selected"}), 400
+    if not allowed_file(file.filename):
+        return jsonify({"error": "Only .docx allowed"}), 400
 
+    job_id, filename = _enqueue_job(file)
     return jsonify({"job_id": job_id, "filename": filename})
 
 
@@ -143,45 +250,27 @@ def start_multi():
         return jsonify({"error": "No files uploaded"}), 400
 
     jobs = []
-    project_root = os.path.dirname(os.path.abspath(__file__))
-    out_dir = os.path.join(project_root, "convertedDocx")
-    os.makedirs(out_dir, exist_ok=True)
-
     for f in files:
         if f.filename == "":
             return jsonify({"error": "One of the files has an empty filename"}), 400
         if not allowed_file(f.filename):
             return jsonify({"error": f"Unsupported file: {f.filename}"}), 400
 
-        filename = sanitize_filename_keep_parens(f.filename)
-        tmpdir = tempfile.mkdtemp()
-        input_path = os.path.join(tmpdir, f"{uuid.uuid4()}_{filename}")
-        f.save(input_path)
-
-        output_path = os.path.join(out_dir, filename)
-        job_id = str(uuid.uuid4())
-        with JOBS_LOCK:
-            JOBS[job_id] = {
-                "status": "queued",
-                "filename": filename,
-                "processing_pct": 0,
-                "final_path": None,
-                "error": None,
-                "input_path": input_path,
-                "output_path": output_path,
-            }
-        JOB_QUEUE.put(job_id)
+        job_id, filename = _enqueue_job(f)
         jobs.append({"job_id": job_id, "filename": filename})
 
     return jsonify({"jobs": jobs})
 
 
-@app.route("/progress/<job_id>", methods=["GET"]) 
+@app.route("/progress/<job_id>", methods=["GET"])
 def progress(job_id):
     with JOBS_LOCK:
         job = JOBS.get(job_id)
-        if not job:
-            return jsonify({"error": "Invalid job id"}), 404
+        if job:
+            JOBS.move_to_end(job_id)
+    if not job:
+        return jsonify({"error": "Invalid job id"}), 404
+    with job["lock"]:
         return jsonify({
             "status": job["status"],
             "processing_pct": job.get("processing_pct", 0),
@@ -190,12 +279,15 @@ def progress(job_id):
         })
 
 
-@app.route("/result/<job_id>", methods=["GET"]) 
+@app.route("/result/<job_id>", methods=["GET"])
 def result(job_id):
     with JOBS_LOCK:
         job = JOBS.get(job_id)
-        if not job:
-            return jsonify({"error": "Invalid job id"}), 404
+        if job:
+            JOBS.move_to_end(job_id)
+    if not job:
+        return jsonify({"error": "Invalid job id"}), 404
+    with job["lock"]:
         if job["status"] != "done" or not job.get("final_path"):
             return jsonify({"error": "Not ready"}), 400
         path = job["final_path"]
@@ -204,56 +296,31 @@ def result(job_id):
     return send_file(path, as_attachment=True, download_name=name)
 
 
-@app.route("/convert", methods=["POST"]) 
+@app.route("/convert", methods=["POST"])
 def convert():
+    # Legacy endpoint. It used to run the conversion synchronously on the
+    # request thread, holding a server worker for the whole job; it now
+    # enqueues like /start and answers 202 with where to poll.
     if "file" not in request.files:
-        flash("No file part in the request.", "error")
-        return redirect(url_for("index"))
-
+        return jsonify({"error": "No file part"}), 400
     file = request.files["file"]
     if file.filename == "":
-        flash("No file selected.", "error")
-        return redirect(url_for("index"))
-
+        return jsonify({"error": "No file selected"}), 400
     if not allowed_file(file.filename):
-        flash("Please upload a .docx file.", "error")
-        return redirect(url_for("index"))
-
-    filename = sanitize_filename_keep_parens(file.filename)
-
-    # Temporary input path
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = os.path.join(tmpdir, f"{uuid.uuid4()}_{filename}")
-        file.save(input_path)
-
-        # Ensure output directory exists in project root
-        project_root = os.path.dirname(os.path.abspath(__file__))
-        out_dir = os.path.join(project_root, "convertedDocx")
-        os.makedirs(out_dir, exist_ok=True)
-
-        # Save with the same name as the uploaded file
-        out_name = filename
-        output_path = os.path.join(out_dir, out_name)
-
-        try:
-            final_path = process_doc(input_path, output_path=output_path, visible=False)
-        except FileNotFoundError:
-            flash("Uploaded file could not be found.", "error")
-            return redirect(url_for("index"))
-        except Exception as e:
-            # Helpful message for COM/Word issues
-            flash("Conversion failed. Ensure Microsoft Word is installed and that 'pywin32' is available.", "error")
-            app.logger.exception("Conversion error: %s", e)
-            return redirect(url_for("index"))
+        return jsonify({"error": "Only .docx allowed"}), 400
 
-        # Send file as attachment from the permanent convertedDocx folder
-        return send_file(final_path, as_attachment=True, download_name=out_name)
+    job_id, filename = _enqueue_job(file)
+    return (
+        jsonify({"job_id": job_id, "filename": filename}),
+        202,
+        {"Location": url_for("progress", job_id=job_id)},
+    )
 
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     # Disable the reloader to avoid spawning multiple processes which interferes with COM
-    # Start the single worker thread for serialized COM automation
-    worker = threading.Thread(target=_worker_loop, daemon=True)
-    worker.start()
+    # Background janitor reclaims temp upload dirs and stale converted outputs
+    janitor = threading.Thread(target=_janitor_loop, daemon=True)
+    janitor.start()
     app.run(host="0.0.0.0", port=port, debug=True, use_reloader=False)
@@ -17,17 +17,20 @@ OUTPUT_DIR = "."             # Where to write Q1.docx ... Q12.docx
 LEFT_INDENT_IN = 0.25        # indent for the whole first line ("n. text...")
 SPACE_BETWEEN_ENTRIES = True
 
+# Question header: "<n>" optionally followed by '.' or ')'. Compiled once
+# instead of per call / per range.
+_HEADER_RE = re.compile(r"^\s*(\d{1,3})\s*[\.\)]?\s*(.*)$")
+
 # Helper: extract question blocks by numeric numbering at paragraph start.
 # Assumes each question starts with a paragraph beginning with "<n>" optionally followed by '.' or ')'
 def extract_questions_from_docx(path, max_q=12):
     doc = Document(path)
-    header_re = re.compile(r"^\s*(\d{1,3})\s*[\.\)]?\s*(.*)$")
     paras = doc.paragraphs
 
     # Identify candidate starts
     starts = []
     for i, p in enumerate(paras):
-        m = header_re.match(p.text.strip())
+        m = _HEADER_RE.match(p.text.strip())
         if m:
             try:
                 num = int(m.group(1))
@@ -54,11 +57,10 @@ def extract_questions_from_docx(path, max_q=12):
         block = paras[s:e]
         cleaned = []
         first = True
-        header_re2 = re.compile(r"^\s*(\d{1,3})\s*[\.\)]?\s*(.*)$")
         for p in block:
             text = p.text
             if first:
-                m = header_re2.match(text.strip())
+                m = _HEADER_RE.match(text.strip())
                 if m and int(m.group(1)) == num:
                     rest = m.group(2).strip()
                     text = rest if rest else ""
@@ -1,56 +1,101 @@
 import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from docx import Document
+from lxml import etree
 import glob
 
-def get_table_text(table):
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_BODY = f"{{{_W_NS}}}body"
+_W_P = f"{{{_W_NS}}}p"
+_W_TBL = f"{{{_W_NS}}}tbl"
+_W_TR = f"{{{_W_NS}}}tr"
+_W_TC = f"{{{_W_NS}}}tc"
+_W_R = f"{{{_W_NS}}}r"
+_W_T = f"{{{_W_NS}}}t"
+_W_TAB = f"{{{_W_NS}}}tab"
+_W_BR = f"{{{_W_NS}}}br"
+_W_CR = f"{{{_W_NS}}}cr"
+_W_NBH = f"{{{_W_NS}}}noBreakHyphen"
+
+def get_paragraph_text(p):
+    # Mirror python-docx's Paragraph.text: w:t content plus explicit tabs,
+    # line breaks and non-breaking hyphens, scanning runs only (w:pPr also
+    # contains w:tab elements)
+    parts = []
+    for run in p.iter(_W_R):
+        for node in run.iter(_W_T, _W_TAB, _W_BR, _W_CR, _W_NBH):
+            if node.tag == _W_T:
+                parts.append(node.text or "")
+            elif node.tag == _W_TAB:
+                parts.append("\t")
+            elif node.tag == _W_NBH:
+                parts.append("-")
+            else:
+                parts.append("\n")
+    return "".join(parts)
+
+def get_table_text(tbl):
+    # tbl is a <w:tbl> element; join cell texts with spaces, rows with newlines
     text = []
-    for row in table.rows:
+    for row in tbl.iter(_W_TR):
         row_text = []
-        for cell in row.cells:
-            if cell.text.strip():
-                row_text.append(cell.text.strip())
+        for cell in row.iter(_W_TC):
+            cell_text = "\n".join(get_paragraph_text(p) for p in cell.findall(_W_P)).strip()
+            if cell_text:
+                row_text.append(cell_text)
         if row_text:
             text.append(" ".join(row_text))
     return "\n".join(text)
 
 def extract_question(doc_path, question_number):
+    # Stream word/document.xml instead of loading the file through
+    # python-docx: Document() builds Paragraph/Run objects for the whole
+    # document when all we need is the text up to the next question header.
+    # iterparse yields each <w:p>/<w:tbl> as it completes, and cleared
+    # elements keep peak memory flat regardless of document size.
     try:
-        doc = Document(doc_path)
-        content = []
         question_content = []
         capturing = False
-        next_question_number = question_number + 1
-
-        # First, create a combined list of content from both paragraphs and tables
-        for element in doc.element.body:
-            if element.tag.endswith('p'):  # It's a paragraph
-                content.append(("p", doc.paragraphs[len([p for p in content if p[0] == "p"])].text))
-            elif element.tag.endswith('tbl'):  # It's a table
-                table_idx = len([t for t in content if t[0] == "tbl"])
-                table_text = get_table_text(doc.tables[table_idx])
-                if table_text.strip():
-                    content.append(("tbl", table_text))
-
-        # Now process the combined content
-        for content_type, text in content:
-            text = text.strip()
-            if not text:
-                continue
-
-            # Start capturing when we find our target question
-            if text.startswith(f"{question_number}."):
-                capturing = True
-                question_content.append(text)
-                continue
-            
-            # Stop capturing if we hit the next question number
-            if capturing and text.startswith(f"{next_question_number}."):
-                break
-            
-            # While capturing, append non-empty content
-            if capturing and text:
-                question_content.append(text)
-            
+        prefix = f"{question_number}."
+        next_prefix = f"{question_number + 1}."
+
+        with zipfile.ZipFile(doc_path) as z, z.open("word/document.xml") as f:
+            for _, elem in etree.iterparse(f, events=("end",), tag=(_W_P, _W_TBL)):
+                parent = elem.getparent()
+                if parent is None or parent.tag != _W_BODY:
+                    # Paragraph (or nested table) inside a table cell; its text
+                    # is captured when the enclosing top-level table completes.
+                    continue
+
+                if elem.tag == _W_P:
+                    text = get_paragraph_text(elem).strip()
+                else:
+                    text = get_table_text(elem).strip()
+
+                # Evict consumed elements so memory stays flat
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+                if not text:
+                    continue
+
+                # Start capturing when we find our target question
+                if text.startswith(prefix):
+                    capturing = True
+                    question_content.append(text)
+                    continue
+
+                # Stop parsing as soon as we hit the next question number
+                if capturing and text.startswith(next_prefix):
+                    break
+
+                # While capturing, append non-empty content
+                if capturing:
+                    question_content.append(text)
+
         return "\n".join(question_content) if question_content else None
     except Exception as e:
         print(f"Error reading {doc_path}: {str(e)}")
@@ -86,14 +131,25 @@ def create_question_paper():
     missing_files = []
     error_files = []
     processed_files = []
-    
+
+    existing_files = []
     for file in docx_files:
-        if not os.path.exists(file):
+        if os.path.exists(file):
+            existing_files.append(file)
+        else:
             missing_files.append(file)
-            continue
-            
-        try:
-            question = extract_question(file, question_number)
+
+    # Each file is parsed from scratch and independently of the others, so fan
+    # the extraction out across processes (python-docx parsing is CPU-bound and
+    # holds the GIL, so threads would not help). pool.map preserves submission
+    # order, so the assembled document is identical to the sequential version.
+    with ProcessPoolExecutor() as pool:
+        results = pool.map(
+            partial(extract_question, question_number=question_number),
+            existing_files,
+            chunksize=4,
+        )
+        for file, question in zip(existing_files, results):
             if question:
                 question_count += 1
                 processed_files.append(file)
@@ -103,8 +159,6 @@ def create_question_paper():
                 new_doc.add_paragraph()
             else:
                 error_files.append((file, "No question found"))
-        except Exception as e:
-            error_files.append((file, str(e)))
     
     # Print debug information
     print("\n=== Processing Summary ===")
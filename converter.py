@@ -1,6 +1,8 @@
+import atexit
+import logging
 import os
-import time
 import re
+import threading
 import pythoncom
 import win32com.client as win32
 import win32com as win32com_root
@@ -8,6 +10,45 @@ import shutil
 from win32com.client import dynamic
 from win32com.client import constants
 
+from converter_xml import UnsupportedNumberingError, process_doc_xml
+
+_logger = logging.getLogger(__name__)
+
+# Leading "21." / "21)" (optionally followed by a space) at the start of a
+# paragraph. Compiled once instead of per paragraph in the conversion loop.
+_LEAD_RE = re.compile(r'^(\d+[\.\)]\s?)(.+)$', re.ASCII)
+
+# Word enum values used in the hot loops, cached as plain ints on first use so
+# classification does int comparisons instead of a pywin32 constants attribute
+# lookup per paragraph.
+_WD_LIST_NO_NUMBERING = None
+_WD_LIST_NUM_ONLY = None
+_WD_LIST_SIMPLE_NUMBERING = None
+_WD_LIST_OUTLINE_NUMBERING = None
+_WD_FORMAT_XML_DOCUMENT = None
+
+
+def _cache_wd_constants():
+    global _WD_LIST_NO_NUMBERING, _WD_LIST_NUM_ONLY, _WD_LIST_SIMPLE_NUMBERING
+    global _WD_LIST_OUTLINE_NUMBERING, _WD_FORMAT_XML_DOCUMENT
+    if _WD_LIST_NO_NUMBERING is not None:
+        return
+    try:
+        _WD_LIST_NO_NUMBERING = int(constants.wdListNoNumbering)
+        _WD_LIST_NUM_ONLY = int(constants.wdListListNumOnly)
+        _WD_LIST_SIMPLE_NUMBERING = int(constants.wdListSimpleNumbering)
+        _WD_LIST_OUTLINE_NUMBERING = int(constants.wdListOutlineNumbering)
+        _WD_FORMAT_XML_DOCUMENT = int(constants.wdFormatXMLDocument)
+    except AttributeError:
+        # constants are only populated under gencache dispatch; when the
+        # dynamic-dispatch fallback is in use fall back to the documented
+        # WdListType / WdSaveFormat enum values.
+        _WD_LIST_NO_NUMBERING = 0
+        _WD_LIST_NUM_ONLY = 1
+        _WD_LIST_SIMPLE_NUMBERING = 3
+        _WD_LIST_OUTLINE_NUMBERING = 4
+        _WD_FORMAT_XML_DOCUMENT = 12
+
 
 def is_question_paragraph(p):
     """
@@ -20,14 +61,18 @@ def is_question_paragraph(p):
     text = p.Range.Text.strip()
     if text.lower().startswith("answer") or text.lower().startswith("explanation"):
         return False
+    _cache_wd_constants()
     lf = p.Range.ListFormat
     try:
+        # Read each COM property once into a local; every access is a
+        # cross-process round-trip.
         # ListType will be non-zero for numbered/bulleted; LevelNumber is 1-based
-        is_list = lf.ListType != constants.wdListNoNumbering
-        is_numbered = lf.ListType in (
-            constants.wdListOutlineNumbering,
-            constants.wdListSimpleNumbering
-        ) or lf.ListType == constants.wdListListNumOnly
+        list_type = lf.ListType
+        is_list = list_type != _WD_LIST_NO_NUMBERING
+        is_numbered = list_type in (
+            _WD_LIST_OUTLINE_NUMBERING,
+            _WD_LIST_SIMPLE_NUMBERING
+        ) or list_type == _WD_LIST_NUM_ONLY
         at_top_level = (lf.ListLevelNumber == 1)
         return is_list and is_numbered and at_top_level
     except Exception:
@@ -77,48 +122,158 @@ def _ensure_word_dispatch():
         return dynamic.Dispatch("Word.Application")
 
 
+# One warm Word.Application per worker thread. Launching winword.exe costs
+# seconds and dominated per-file latency; keeping the instance alive between
+# jobs means only Document objects are opened and closed per conversion.
+_WORD_TLS = threading.local()
+_LIVE_WORDS_LOCK = threading.Lock()
+_LIVE_WORDS = []
+
+
+def _ensure_com_initialized():
+    """
+    Initialize COM once per worker thread. CoInitialize is per-thread and
+    ref-counted; pairing it with CoUninitialize on every job was wasted work
+    (and would tear the apartment out from under the warm Word instance if
+    the pairing ever slipped). The worker threads are daemons that live for
+    the whole process, so the apartment is reclaimed at process exit.
+    """
+    if not getattr(_WORD_TLS, "com_initialized", False):
+        pythoncom.CoInitialize()
+        _WORD_TLS.com_initialized = True
+
+
+def _get_word():
+    word = getattr(_WORD_TLS, "word", None)
+    if word is None:
+        word = _ensure_word_dispatch()
+        _WORD_TLS.word = word
+        with _LIVE_WORDS_LOCK:
+            _LIVE_WORDS.append(word)
+    return word
+
+
+def _discard_word():
+    """Drop this thread's cached Word instance (e.g. after it died)."""
+    word = getattr(_WORD_TLS, "word", None)
+    _WORD_TLS.word = None
+    if word is None:
+        return
+    with _LIVE_WORDS_LOCK:
+        try:
+            _LIVE_WORDS.remove(word)
+        except ValueError:
+            pass
+    try:
+        word.Quit()
+    except Exception:
+        pass
+
+
+# HRESULT carried by the com_error Word raises when Documents.Open cannot
+# find the file (VBA error 5174 wrapped as 0x800A1436).
+_HR_FILE_NOT_FOUND = -2146823114
+
+
+def _open_document(word, path):
+    """Open a document, translating Word's file-not-found COM error."""
+    try:
+        return word.Documents.Open(path)
+    except pythoncom.com_error as e:
+        scode = e.excepinfo[5] if e.excepinfo else e.hresult
+        if scode == _HR_FILE_NOT_FOUND:
+            raise FileNotFoundError(f"File not found: {path}") from e
+        raise
+
+
+@atexit.register
+def _quit_warm_words():
+    # Best-effort shutdown of the cached instances so winword.exe processes
+    # aren't orphaned when the (daemon) worker threads are torn down.
+    pythoncom.CoInitialize()
+    with _LIVE_WORDS_LOCK:
+        words, _LIVE_WORDS[:] = _LIVE_WORDS[:], []
+    for word in words:
+        try:
+            word.Quit()
+        except Exception:
+            pass
+
+
+def _clear_indents(doc, targets):
+    """
+    Remove left and first-line indents for the target paragraphs. Contiguous
+    paragraphs are coalesced into single Ranges so each run costs two COM
+    property writes instead of two per paragraph.
+    """
+    spans = []
+    for p in targets:
+        try:
+            rng = p.Range
+            spans.append([rng.Start, rng.End])
+        except Exception:
+            continue
+    spans.sort()
+    runs = []
+    for span in spans:
+        if runs and span[0] <= runs[-1][1]:
+            runs[-1][1] = max(runs[-1][1], span[1])
+        else:
+            runs.append(span)
+    for start, end in runs:
+        try:
+            fmt = doc.Range(Start=start, End=end).ParagraphFormat
+            fmt.LeftIndent = 0
+            fmt.FirstLineIndent = 0
+        except Exception:
+            pass
+
+
 def convert_questions_to_text(doc, progress=None):
     """
     Convert only top-level auto-numbered question paragraphs to literal text numbers
     and remove indentation for those paragraphs.
     """
-    paragraphs = doc.Paragraphs
-    # Collect candidates first to avoid collection mutation issues
+    # Collect candidates first to avoid collection mutation issues.
+    # Only list-bound paragraphs can be questions, and Word already maintains
+    # the Lists/ListParagraphs collections — walking them skips every plain
+    # paragraph (headers, answers, explanations) that a full doc.Paragraphs
+    # scan had to classify and reject over COM.
     targets = []
-    for i in range(1, paragraphs.Count + 1):
-        p = paragraphs.Item(i)
-        if is_question_paragraph(p):
-            targets.append(p)
+    for list_ in doc.Lists:
+        for p in list_.ListParagraphs:
+            if is_question_paragraph(p):
+                targets.append(p)
 
     total = len(targets)
     processed = 0
     for p in targets:
-        # Convert only this paragraph's numbering to text
+        # Convert only this paragraph's numbering to text. This stays
+        # per-paragraph: ConvertNumbersToText is list-scoped and has no bulk
+        # equivalent that would leave other list levels untouched.
         try:
             p.Range.ListFormat.ConvertNumbersToText()
         except Exception:
             # If already plain text or not applicable, ignore
             pass
 
-        # Remove left indent and first-line indent
-        try:
-            p.LeftIndent = 0
-            p.FirstLineIndent = 0
-        except Exception:
-            pass
-
         # Ensure a single space after the number if Word produced "21." or "21)" without space
         rng = p.Range
         txt = rng.Text
         # Work only on the paragraph text (ignore end-of-paragraph mark)
         core = txt[:-1] if txt.endswith('\r') else txt
-        m = re.match(r'^(\d+[\.\)]\s?)(.+)$', core)
-        if m:
-            lead, rest = m.groups()
-            if not lead.endswith(' '):
-                core = lead + ' ' + rest
-            # Write back preserving paragraph end
-            rng.Text = core + ('\r' if txt.endswith('\r') else '')
+        # Cheap digit check first so the regex only runs on paragraphs that
+        # could actually need the fix
+        if core and core[0].isdigit():
+            m = _LEAD_RE.match(core)
+            if m:
+                lead, rest = m.groups()
+                # Setting Range.Text is an expensive COM write; only pay it
+                # when the space is actually missing
+                if not lead.endswith(' '):
+                    core = lead + ' ' + rest
+                    # Write back preserving paragraph end
+                    rng.Text = core + ('\r' if txt.endswith('\r') else '')
 
         processed += 1
         if progress and total > 0:
@@ -128,26 +283,53 @@ def convert_questions_to_text(doc, progress=None):
             except Exception:
                 pass
 
+    # Indents are cleared after the text pass so the coalesced ranges reflect
+    # any edits made above.
+    _clear_indents(doc, targets)
+
 
 def process_doc(input_path: str, output_path: str | None = None, visible: bool = False, progress=None) -> str:
     """
     Open the Word document at input_path, convert question numbering to plain text, remove indentation,
     and save the result to output_path (or auto-name if None). Returns the output path.
     """
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"File not found: {input_path}")
+    # No stat() pre-check: Documents.Open has to look the file up anyway, and
+    # a missing file surfaces as FileNotFoundError via _open_document.
+    input_path = os.path.abspath(os.fspath(input_path))
+
+    # Fast path: rewrite the document XML directly, skipping Word entirely.
+    # Documents whose numbering the XML converter does not model fall back
+    # to the COM pipeline below.
+    try:
+        return process_doc_xml(input_path, output_path, progress=progress)
+    except FileNotFoundError:
+        raise
+    except UnsupportedNumberingError:
+        pass
+    except Exception:
+        # Unexpected fast-path failures shouldn't fail the job; let Word try
+        _logger.exception("XML fast path failed for %s; falling back to Word", input_path)
 
     # Initialize COM for this thread (Flask may serve requests in worker threads)
-    pythoncom.CoInitialize()
-    word = None
+    _ensure_com_initialized()
     doc = None
     try:
-        word = _ensure_word_dispatch()
-        word.Visible = visible
-
-        doc = word.Documents.Open(os.path.abspath(input_path))
+        word = _get_word()
+        try:
+            word.Visible = visible
+            doc = _open_document(word, input_path)
+        except pythoncom.com_error:
+            # The cached instance may have died (user closed Word, crash);
+            # rebuild it once and retry before giving up.
+            _discard_word()
+            word = _get_word()
+            word.Visible = visible
+            doc = _open_document(word, input_path)
         try:
-            doc.Fields.Update()
+            # Update() recalcs every field; question papers usually have
+            # none, and Count is a single cheap RPC
+            if doc.Fields.Count:
+                doc.Fields.Update()
         except Exception:
             pass
 
@@ -157,7 +339,8 @@ def process_doc(input_path: str, output_path: str | None = None, visible: bool =
         if not output_path:
             root, ext = os.path.splitext(input_path)
             output_path = root + "_numbered_plain.docx"
-        doc.SaveAs(os.path.abspath(output_path), FileFormat=constants.wdFormatXMLDocument)
+        _cache_wd_constants()
+        doc.SaveAs(os.path.abspath(output_path), FileFormat=_WD_FORMAT_XML_DOCUMENT)
         return os.path.abspath(output_path)
     finally:
         try:
@@ -165,12 +348,4 @@ def process_doc(input_path: str, output_path: str | None = None, visible: bool =
                 doc.Close(SaveChanges=False)
         except Exception:
             pass
-        # Ensure Word is quit if it was created
-        try:
-            if word is not None:
-                time.sleep(0.2)
-                word.Quit()
-        except Exception:
-            pass
-        # Uninitialize COM for this thread
-        pythoncom.CoUninitialize()
+        # Word itself stays warm for the next job; only the document is closed.
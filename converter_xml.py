@@ -0,0 +1,325 @@
+"""
+Direct-XML fast path for removing auto-numbering, bypassing Word COM.
+
+Rewrites word/document.xml inside the .docx zip: each top-level
+decimal-numbered question paragraph gets its computed number inserted as a
+literal text run, its numbering reference removed, and its indentation
+zeroed. No Word process is launched, so a document converts in milliseconds
+instead of seconds and the path has no Windows dependency.
+
+The module only models plain decimal top-level numbering applied directly on
+the paragraph (the question-paper case). Anything it cannot reproduce
+faithfully — letter/roman formats, level overrides that redefine a level,
+deeper list levels sharing a top-level list, numbered Answer/Explanation
+paragraphs, numbering inherited from a paragraph style, abstractNums whose
+levels live behind a numStyleLink — raises UnsupportedNumberingError so
+callers can fall back to the COM converter.
+"""
+
+import os
+import zipfile
+from lxml import etree
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+_W_BODY = f"{{{_W_NS}}}body"
+_W_P = f"{{{_W_NS}}}p"
+_W_PPR = f"{{{_W_NS}}}pPr"
+_W_RPR = f"{{{_W_NS}}}rPr"
+_W_NUMPR = f"{{{_W_NS}}}numPr"
+_W_ILVL = f"{{{_W_NS}}}ilvl"
+_W_NUMID = f"{{{_W_NS}}}numId"
+_W_IND = f"{{{_W_NS}}}ind"
+_W_R = f"{{{_W_NS}}}r"
+_W_T = f"{{{_W_NS}}}t"
+_W_ABSTRACT_NUM = f"{{{_W_NS}}}abstractNum"
+_W_NUM = f"{{{_W_NS}}}num"
+_W_ABSTRACT_NUM_ID = f"{{{_W_NS}}}abstractNumId"
+_W_LVL = f"{{{_W_NS}}}lvl"
+_W_LVL_OVERRIDE = f"{{{_W_NS}}}lvlOverride"
+_W_START_OVERRIDE = f"{{{_W_NS}}}startOverride"
+_W_START = f"{{{_W_NS}}}start"
+_W_NUM_FMT = f"{{{_W_NS}}}numFmt"
+_W_LVL_TEXT = f"{{{_W_NS}}}lvlText"
+
+_W_VAL = f"{{{_W_NS}}}val"
+_W_LEFT = f"{{{_W_NS}}}left"
+_W_FIRST_LINE = f"{{{_W_NS}}}firstLine"
+_W_HANGING = f"{{{_W_NS}}}hanging"
+
+_W_STYLE = f"{{{_W_NS}}}style"
+_W_P_STYLE = f"{{{_W_NS}}}pStyle"
+_W_BASED_ON = f"{{{_W_NS}}}basedOn"
+_W_TYPE = f"{{{_W_NS}}}type"
+_W_STYLE_ID = f"{{{_W_NS}}}styleId"
+_W_DEFAULT = f"{{{_W_NS}}}default"
+
+
+class UnsupportedNumberingError(Exception):
+    """The document uses numbering this fast path does not model."""
+
+
+def _parse_numbering(zf):
+    """
+    Map numId -> top-level (ilvl 0) numbering info from word/numbering.xml:
+    {"abstract": str, "fmt": str, "lvl_text": str, "start": int,
+     "start_override": int | None, "complex_override": bool}.
+    An abstractNum that defines no ilvl-0 w:lvl of its own (e.g. it pulls its
+    levels in via w:numStyleLink) maps its numIds to None — Word still renders
+    numbers for those, so referencing paragraphs must force the COM fallback
+    rather than be skipped as unnumbered.
+    """
+    try:
+        data = zf.read("word/numbering.xml")
+    except KeyError:
+        return {}
+    root = etree.fromstring(data)
+
+    abstracts = {}
+    for abstract in root.findall(_W_ABSTRACT_NUM):
+        aid = abstract.get(_W_ABSTRACT_NUM_ID)
+        if aid is None:
+            continue
+        lvl0 = None
+        for lvl in abstract.findall(_W_LVL):
+            if lvl.get(_W_ILVL) == "0":
+                lvl0 = lvl
+                break
+        if lvl0 is None:
+            # Levels defined elsewhere (numStyleLink); not modeled here
+            abstracts[aid] = None
+            continue
+        fmt = lvl0.find(_W_NUM_FMT)
+        lvl_text = lvl0.find(_W_LVL_TEXT)
+        start = lvl0.find(_W_START)
+        abstracts[aid] = {
+            "abstract": aid,
+            "fmt": fmt.get(_W_VAL) if fmt is not None else "decimal",
+            "lvl_text": lvl_text.get(_W_VAL) if lvl_text is not None else "%1.",
+            "start": int(start.get(_W_VAL)) if start is not None else 1,
+        }
+
+    nums = {}
+    for num in root.findall(_W_NUM):
+        num_id = num.get(_W_NUMID)
+        abstract_ref = num.find(_W_ABSTRACT_NUM_ID)
+        if num_id is None or abstract_ref is None:
+            continue
+        aid = abstract_ref.get(_W_VAL)
+        if aid not in abstracts:
+            continue
+        info = abstracts[aid]
+        if info is None:
+            nums[num_id] = None
+            continue
+        entry = dict(info, start_override=None, complex_override=False)
+        for override in num.findall(_W_LVL_OVERRIDE):
+            if override.get(_W_ILVL) != "0":
+                continue
+            start_override = override.find(_W_START_OVERRIDE)
+            if start_override is not None:
+                entry["start_override"] = int(start_override.get(_W_VAL))
+            if override.find(_W_LVL) is not None:
+                # Full level redefinition; punt to Word rather than guess
+                entry["complex_override"] = True
+        nums[num_id] = entry
+    return nums
+
+
+def _parse_numbered_styles(zf):
+    """
+    Style ids of paragraph styles whose definition carries a w:numPr, directly
+    or via its basedOn chain. Numbering applied through a style is invisible
+    to the paragraph-level scan, so paragraphs using these styles must force
+    the COM fallback. Contains None when the default paragraph style is
+    numbered (paragraphs without an explicit pStyle use it).
+    """
+    try:
+        data = zf.read("word/styles.xml")
+    except KeyError:
+        return set()
+    root = etree.fromstring(data)
+
+    has_numpr = {}
+    based_on = {}
+    default_id = None
+    for style in root.findall(_W_STYLE):
+        if style.get(_W_TYPE) != "paragraph":
+            continue
+        style_id = style.get(_W_STYLE_ID)
+        if style_id is None:
+            continue
+        pPr = style.find(_W_PPR)
+        has_numpr[style_id] = pPr is not None and pPr.find(_W_NUMPR) is not None
+        base = style.find(_W_BASED_ON)
+        if base is not None:
+            based_on[style_id] = base.get(_W_VAL)
+        if style.get(_W_DEFAULT) in ("1", "true"):
+            default_id = style_id
+
+    numbered = set()
+    for style_id in has_numpr:
+        seen = set()
+        current = style_id
+        while current is not None and current not in seen:
+            seen.add(current)
+            if has_numpr.get(current):
+                numbered.add(style_id)
+                break
+            current = based_on.get(current)
+    if default_id in numbered:
+        numbered.add(None)
+    return numbered
+
+
+def _paragraph_text(p):
+    return "".join(t.text or "" for t in p.iter(_W_T))
+
+
+def _zero_indent(pPr):
+    """Set explicit zero indents so style-inherited list indentation is overridden."""
+    ind = pPr.find(_W_IND)
+    if ind is None:
+        ind = etree.Element(_W_IND)
+        # Keep pPr roughly schema-ordered: ind belongs before the
+        # paragraph-mark rPr when one is present
+        rPr = pPr.find(_W_RPR)
+        if rPr is not None:
+            rPr.addprevious(ind)
+        else:
+            pPr.append(ind)
+    ind.set(_W_LEFT, "0")
+    ind.set(_W_FIRST_LINE, "0")
+    # hanging and firstLine are mutually exclusive
+    ind.attrib.pop(_W_HANGING, None)
+
+
+def _convert_body(root, nums, numbered_styles, progress=None):
+    body = root.find(_W_BODY)
+    if body is None:
+        raise UnsupportedNumberingError("document has no body")
+
+    # First pass: classify every numbered paragraph
+    candidates = []
+    converted_abstracts = set()
+    deeper_abstracts = set()
+    for p in body.iter(_W_P):
+        pPr = p.find(_W_PPR)
+        numPr = pPr.find(_W_NUMPR) if pPr is not None else None
+        num_ref = numPr.find(_W_NUMID) if numPr is not None else None
+        if num_ref is None:
+            # No direct numbering reference; numbering can still arrive via
+            # the paragraph style, which this scan cannot see
+            style_el = pPr.find(_W_P_STYLE) if pPr is not None else None
+            style_id = style_el.get(_W_VAL) if style_el is not None else None
+            if style_id in numbered_styles:
+                raise UnsupportedNumberingError(
+                    f"numbering applied via paragraph style {style_id!r}"
+                )
+            continue
+        num_id = num_ref.get(_W_VAL)
+        if num_id == "0":
+            # Explicitly disabled numbering
+            continue
+        if num_id not in nums:
+            # Truly dangling reference; Word renders it unnumbered
+            continue
+        info = nums[num_id]
+        if info is None:
+            raise UnsupportedNumberingError(
+                f"numId {num_id} has no top-level lvl definition (numStyleLink)"
+            )
+        ilvl_el = numPr.find(_W_ILVL)
+        ilvl = int(ilvl_el.get(_W_VAL)) if ilvl_el is not None else 0
+        if ilvl != 0:
+            # Removing level-0 items would change how deeper levels of the
+            # same list restart; remember the list and bail out below if it
+            # is one we convert
+            deeper_abstracts.add(info["abstract"])
+            continue
+        if info["fmt"] == "bullet":
+            continue
+        if info["complex_override"] or info["fmt"] != "decimal":
+            raise UnsupportedNumberingError(f"numFmt {info['fmt']!r} on numId {num_id}")
+        lvl_text = info["lvl_text"]
+        if "%1" not in lvl_text or "%2" in lvl_text:
+            raise UnsupportedNumberingError(f"lvlText {lvl_text!r} on numId {num_id}")
+        text = _paragraph_text(p).strip().lower()
+        if text.startswith("answer") or text.startswith("explanation"):
+            # A numbered non-question shares the counter with the questions;
+            # only Word can renumber the remainder of the list correctly
+            raise UnsupportedNumberingError("numbered answer/explanation paragraph")
+        candidates.append((p, pPr, numPr, num_id, info))
+        converted_abstracts.add(info["abstract"])
+
+    if converted_abstracts & deeper_abstracts:
+        raise UnsupportedNumberingError("multi-level list shares the top-level numbering")
+
+    # Second pass: replace each numbering reference with a literal number run
+    counters = {}
+    seen_num_ids = set()
+    total = len(candidates)
+    processed = 0
+    for p, pPr, numPr, num_id, info in candidates:
+        aid = info["abstract"]
+        if aid not in counters:
+            counters[aid] = info["start"]
+        if info["start_override"] is not None and num_id not in seen_num_ids:
+            counters[aid] = info["start_override"]
+        seen_num_ids.add(num_id)
+        n = counters[aid]
+        counters[aid] = n + 1
+
+        # "21." -> "21. " with a single space, matching the COM pipeline
+        label = info["lvl_text"].replace("%1", str(n))
+        if not label.endswith(" "):
+            label += " "
+        run = etree.Element(_W_R)
+        t = etree.SubElement(run, _W_T)
+        t.set(_XML_SPACE, "preserve")
+        t.text = label
+        p.insert(p.index(pPr) + 1, run)
+
+        pPr.remove(numPr)
+        _zero_indent(pPr)
+
+        processed += 1
+        if progress and total > 0:
+            try:
+                progress(int((processed / total) * 100))
+            except Exception:
+                pass
+
+
+def process_doc_xml(input_path, output_path=None, progress=None):
+    """
+    Convert auto-numbered question paragraphs to literal text numbers by
+    rewriting word/document.xml directly. Returns the output path, or raises
+    UnsupportedNumberingError when the document needs the COM converter.
+    """
+    input_path = os.path.abspath(os.fspath(input_path))
+    if not output_path:
+        root, ext = os.path.splitext(input_path)
+        output_path = root + "_numbered_plain.docx"
+    output_path = os.path.abspath(output_path)
+
+    with zipfile.ZipFile(input_path) as zf:
+        try:
+            doc_xml = zf.read("word/document.xml")
+        except KeyError:
+            raise UnsupportedNumberingError("no word/document.xml part")
+        root = etree.fromstring(doc_xml)
+        _convert_body(
+            root, _parse_numbering(zf), _parse_numbered_styles(zf), progress=progress
+        )
+        new_xml = etree.tostring(
+            root, xml_declaration=True, encoding="UTF-8", standalone=True
+        )
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zf.infolist():
+                if item.filename == "word/document.xml":
+                    zout.writestr(item, new_xml)
+                else:
+                    zout.writestr(item, zf.read(item.filename))
+    return output_path
@@ -1,9 +1,14 @@
 import sys
 import os
+import re
 import time
 import win32com.client as win32
 from win32com.client import constants
 
+# Leading "21." / "21)" (optionally followed by a space) at the start of a
+# paragraph. Compiled once instead of per paragraph in the conversion loop.
+_LEAD_RE = re.compile(r'^(\d+[\.\)]\s?)(.+)$', re.ASCII)
+
 def is_question_paragraph(p):
     """
     Heuristic to identify question lines:
@@ -17,12 +22,15 @@ def is_question_paragraph(p):
         return False
     lf = p.Range.ListFormat
     try:
+        # Read each COM property once into a local; every access is a
+        # cross-process round-trip.
         # ListType will be non-zero for numbered/bulleted; LevelNumber is 1-based
-        is_list = lf.ListType != constants.wdListNoNumbering
-        is_numbered = lf.ListType in (
+        list_type = lf.ListType
+        is_list = list_type != constants.wdListNoNumbering
+        is_numbered = list_type in (
             constants.wdListOutlineNumbering,
             constants.wdListSimpleNumbering
-        ) or lf.ListType == constants.wdListListNumOnly
+        ) or list_type == constants.wdListListNumOnly
         at_top_level = (lf.ListLevelNumber == 1)
         return is_list and is_numbered and at_top_level
     except Exception:
@@ -33,11 +41,11 @@ def convert_questions_to_text(doc):
     Convert only top-level auto-numbered question paragraphs to literal text numbers
     and remove indentation for those paragraphs.
     """
-    paragraphs = doc.Paragraphs
-    # Collect candidates first to avoid collection mutation issues
+    # Collect candidates first to avoid collection mutation issues.
+    # Iterating the collection directly uses pywin32's IEnumVARIANT enumerator,
+    # which is much cheaper than a per-index Item(i) call per paragraph.
     targets = []
-    for i in range(1, paragraphs.Count + 1):
-        p = paragraphs.Item(i)
+    for p in doc.Paragraphs:
         if is_question_paragraph(p):
             targets.append(p)
 
@@ -62,14 +70,18 @@ def convert_questions_to_text(doc):
         txt = rng.Text
         # Work only on the paragraph text (ignore end-of-paragraph mark)
         core = txt[:-1] if txt.endswith('\r') else txt
-        import re
-        m = re.match(r'^(\d+[\.\)]\s?)(.+)$', core)
-        if m:
-            lead, rest = m.groups()
-            if not lead.endswith(' '):
-                core = lead + ' ' + rest
-            # Write back preserving paragraph end
-            rng.Text = core + ('\r' if txt.endswith('\r') else '')
+        # Cheap digit check first so the regex only runs on paragraphs that
+        # could actually need the fix
+        if core and core[0].isdigit():
+            m = _LEAD_RE.match(core)
+            if m:
+                lead, rest = m.groups()
+                # Setting Range.Text is an expensive COM write; only pay it
+                # when the space is actually missing
+                if not lead.endswith(' '):
+                    core = lead + ' ' + rest
+                    # Write back preserving paragraph end
+                    rng.Text = core + ('\r' if txt.endswith('\r') else '')
 
 def main(input_path, output_path=None, visible=False):
     if not os.path.exists(input_path):
@@ -81,9 +93,11 @@ def main(input_path, output_path=None, visible=False):
 
     try:
         doc = word.Documents.Open(os.path.abspath(input_path))
-        # Ensure list fields are up-to-date
+        # Ensure list fields are up-to-date. Update() recalcs every field;
+        # question papers usually have none, and Count is a single cheap RPC
         try:
-            doc.Fields.Update()
+            if doc.Fields.Count:
+                doc.Fields.Update()
         except Exception:
             pass
 